@@ -1,6 +1,8 @@
 import copy
 import json
+import operator
 import os
+import re
 import types
 from os.path import join, splitext, expanduser
 from pprint import pformat
@@ -36,6 +38,33 @@ from .util import debug
 
 names_for_ctx = ["c", "ctx", "cfg"]
 
+# Lazy path -> function(c) that resolves it; shared by every Lazy with that path.
+_lazy_resolvers = {}
+_dotted_name = re.compile(r"^[A-Za-z_]\w*(\.[A-Za-z_]\w*)*$")
+
+
+def _compile_lazy_path(path):
+    """
+    Turn a Lazy path into a function of the ctx, once per distinct path.
+
+    Plain dotted paths like ``ctx.x.y`` become an ``operator.attrgetter``;
+    anything fancier (``ctx.x[0]``) is compiled once and eval'd per call.
+    """
+    resolver = _lazy_resolvers.get(path)
+    if resolver is None:
+        head, _, tail = path.partition(".")
+        if _dotted_name.match(path) and head in names_for_ctx:
+            resolver = operator.attrgetter(tail) if tail else (lambda c: c)
+        else:
+            code = compile(path, "<Lazy {!r}>".format(path), "eval")
+
+            def resolver(c):
+                return eval(code, {}, {name: c for name in names_for_ctx})
+
+        _lazy_resolvers[path] = resolver
+    return resolver
+
+
 class DataProxy(object):
     """
     Helper class implementing nested dict+attr access for `.Config`.
@@ -1370,7 +1399,7 @@ class Lazy(object):
 
     def __call__(self, c):
         try:
-            return eval(self.path, {}, {name: c for name in names_for_ctx})
+            return _compile_lazy_path(self.path)(c)
         except Exception as e:
             msg = "While evalling {!r}".format(self.path)
             reraise_with_context(e, msg)
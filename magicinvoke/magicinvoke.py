@@ -16,17 +16,28 @@ except ImportError:
     from pathlib2 import Path  # Py2
     from funcsigs import signature, Parameter
 from invoke.config import names_for_ctx
-from invoke.util import raise_from
+from invoke.util import raise_from, six
 from invoke import Collection, task, Lazy, run  # noqa
 from invoke.tasks import Task
 from invoke.vendor.decorator import decorate
 from invoke.exceptions import reraise_with_context
 
-import cachepath  # noqa Add .rm to Paths
+import cachepath  # Also adds .rm to Paths
 from cachepath import CachePath
 
 from .exceptions import SaveReturnvalueError, DerivingArgsError
 
+# PERF NOTE: Before reaching for Numba/Cython/C-accel here, don't :)
+#  (a) There are no numeric hot loops in this module. It's all Python glue:
+#      dict lookups, signature introspection and filesystem syscalls. JIT
+#      dispatch overhead alone would cost more than the code it replaces.
+#  (b) The hot paths, run on every call of a decorated function, are
+#      get_params_from_ctx's _ParamPlan.bind, SkippableDecorator.__call__
+#      (CallInfo.bind), the checkers' can_skip/after_run, and timestamp_differ.
+#  (c) The cheap wins are syscall reduction (fewer stats/mkdirs/opens per call),
+#      doing signature work once at decoration time instead of per call,
+#      and memoizing hashes/paths that don't change between calls.
+
 
 def enable_logging(disable_invoke_logging=True):
     logging.basicConfig(level=logging.DEBUG, format=LOG_FORMAT)
@@ -43,8 +54,10 @@ debug = "dummy"  # noqa
 for x in ("debug",):
     globals()[x] = getattr(log, x)
 
+# Messages are %-formatted lazily like logging does, so disabled debug output
+# costs no string formatting.
 if os.getenv("MAGICINVOKE_TEST_DEBUG"):
-    globals()["debug"] = print
+    globals()["debug"] = lambda msg, *args: print(msg % args if args else msg)
 
 
 def _disable_logging_for_tests():
@@ -52,6 +65,10 @@ def _disable_logging_for_tests():
     logging.getLogger("invoke").setLevel(logging.CRITICAL)
 
 
+# Sentinel for "this step found no value for the param"; None is a valid value.
+_MISSING = object()
+
+
 def get_params_from_ctx(func=None, path=None, derive_kwargs=None):
     """
     Derive parameters for this function from ctx, if possible.
@@ -180,7 +197,7 @@ def get_params_from_ctx(func=None, path=None, derive_kwargs=None):
     sig = signature(func)
     func_name = _get_full_name(func)
     func.ctx_path = path or 'ctx.{}'.format(func_name)
-    debug("Set {}() param ctx-path to {!r}".format(func_name, func.ctx_path))
+    debug("Set %s() param ctx-path to %r", func_name, func.ctx_path)
 
     if path:
         if path.endswith("."):
@@ -193,9 +210,7 @@ def get_params_from_ctx(func=None, path=None, derive_kwargs=None):
                     path, func_name
                 )
             )
-    user_passed_path = (
-        path  # Necessary because otherwise doesn't go into closure on py2.
-    )
+    plan = _ParamPlan(func, sig, func_name, path, derive_kwargs)
 
     @functools.wraps(func)
     def customized_default_decorator(*args, **kwargs):
@@ -205,125 +220,162 @@ def get_params_from_ctx(func=None, path=None, derive_kwargs=None):
         looks for actually required params in ctx. Finally, calls
         original function.
         """
+        # Now that we've generated a kwargs dict that is everything we know about how to call
+        # this function, call it!
+        # TODO We get an 'unexpected kwarg clean' here in Py2 if try to use it.
+        # Funcsigs bug of not respecting __signature__? Review both sources
+        return func(**plan.bind(args, kwargs))
 
-        # Will throw here if too many args/kwargs
-        directly_passed = get_directly_passed(func, sig, args, kwargs)
+    # myparams = (ctx=None, arg1=None, optionalarg1=olddefault)
+    myparams = [
+        p.replace(default=None) if p.default is p.empty else p
+        for p in sig.parameters.values()
+    ]
+    if not myparams or myparams[0].name not in names_for_ctx:
+        raise ValueError("Can't have a derive_kwargs_from_ctx function that doesn't have a context arg!")
+    # Don't provide default for ctx
+    myparams[0] = list(sig.parameters.values())[0]
+    mysig = sig.replace(parameters=myparams)
+    generated_function = customized_default_decorator
+    generated_function.__signature__ = mysig
+    generated_function._param_plan = plan
+    # print('sig here ', mysig.parameters)
 
-        # Task.__call__ will error before us if ctx wasn't passed
-        # Might want a non-task to be skippable, so just try to carry on without ctx.
-        ctx = args[0] if args else None
+    return generated_function
 
-        class fell_through:  # Cheapest sentinel I can come up with
-            pass
-        cache = {'derived': {}, 'ctx_argdict': {}}  # Don't have nonlocal in py2
-
-        def get_directly_passed_arg(param_name):
-            return directly_passed.pop(param_name, fell_through)
-
-        def call_derive_kwargs_or_error(param_name):
-            if not derive_kwargs:
-                return fell_through
-            if not cache['derived']:
-                cache['derived'] = derive_kwargs(ctx)
-            result = cache['derived']
-            return result.get(param_name, fell_through)
-
-        def traverse_path_for_argdict():
-            # Could just use eval(path) with a similar trick to invoke.Lazy.
-            if user_passed_path is None and not ctx:
-                return {}  # that's fine
-            elif user_passed_path and not ctx:
-                # If explicitly ask us to traverse (with a path), but
-                # don't give ctx, what can we do?
-                # msg = "You gave path {!r} for {!r} args but 'ctx' (arg[0]) was {!r}.".format(path, func_name, ctx)
-                msg = "'ctx' (arg[0]) was {!r}. Cannot get dict from {} for args of {!r}.".format(
-                    ctx, user_passed_path, func_name
-                )
-                raise DerivingArgsError(msg)
-
-            path = func.ctx_path
-            seq = path.split(".")
-            looking_in = ctx.get('config', ctx)  # Gracefully handle Configs (not usual Contexts)
-            seq.pop(0)
-            while seq:
-                key = seq.pop(0)
-                try:
-                    looking_in = looking_in[key]
-                except (KeyError, AttributeError) as e:
-                    msg = "while traversing path {!r} for {}() args.".format(path, func_name),
-                    if user_passed_path:
-                        reraise_with_context(
-                            e,
-                            msg,
-                            DerivingArgsError
-                        )
-                    else:
-                        debug("Ignoring {!r} {}".format(type(e).__name__, msg))
-                        return {}
-            return looking_in
 
-        def get_from_ctx(param_name):
-            if not cache['ctx_argdict']:
-                cache['ctx_argdict'] = traverse_path_for_argdict()
-            return cache['ctx_argdict'].get(param_name, fell_through)
+class _ParamPlan(object):
+    """
+    How get_params_from_ctx finds a value for each of a function's params.
+    Everything that only depends on the function is worked out once, here,
+    so that :meth:`bind` is all that runs per call.
+    """
+
+    __slots__ = (
+        "func", "sig", "func_name", "user_passed_path", "derive_kwargs", "path_keys",
+        "param_names", "required_param_names", "param_name_to_callable_default",
+    )
 
-        param_name_to_callable_default = {
+    def __init__(self, func, sig, func_name, user_passed_path, derive_kwargs):
+        self.func = func
+        self.sig = sig
+        self.func_name = func_name
+        self.user_passed_path = user_passed_path
+        self.derive_kwargs = derive_kwargs
+        # Interned, so the config dict lookups in traverse_path_for_argdict can
+        # match keys by identity. (Py2 can only intern byte strings.)
+        self.path_keys = tuple(
+            six.moves.intern(key) if isinstance(key, str) else key
+            for key in func.ctx_path.split(".")[1:]
+        )
+        self.param_names = tuple(sig.parameters)
+        self.required_param_names = tuple(
+            param_name
+            for param_name, param in sig.parameters.items()
+            if param.default is param.empty
+        )
+        self.param_name_to_callable_default = {
             param_name: param.default
-            for param_name, param in signature(func).parameters.items()
+            for param_name, param in sig.parameters.items()
             if param.default is not param.empty and callable(param.default)
         }
 
-        def call_callable_default(param_name):
-            if param_name in param_name_to_callable_default:
-                return param_name_to_callable_default[param_name](ctx)
-            return fell_through
-
-        # Decide through cascading what to use as the value for each parameter
-        args_passing = {}
-        expecting = sig.parameters
-        for param_name in expecting:
-            possibilities = (
-                # First, positionals and kwargs
-                get_directly_passed_arg,
-                # Then check ctx
-                get_from_ctx,
-                call_derive_kwargs_or_error,  # Not really used/tested
-                call_callable_default,
+    def traverse_path_for_argdict(self, ctx):
+        # Could just use eval(path) with a similar trick to invoke.Lazy.
+        user_passed_path, func_name = self.user_passed_path, self.func_name
+        if user_passed_path is None and not ctx:
+            return {}  # that's fine
+        elif user_passed_path and not ctx:
+            # If explicitly ask us to traverse (with a path), but
+            # don't give ctx, what can we do?
+            # msg = "You gave path {!r} for {!r} args but 'ctx' (arg[0]) was {!r}.".format(path, func_name, ctx)
+            msg = "'ctx' (arg[0]) was {!r}. Cannot get dict from {} for args of {!r}.".format(
+                ctx, user_passed_path, func_name
             )
+            raise DerivingArgsError(msg)
 
-            passing = fell_through
-            for p in possibilities:
-                try:
-                    passing = p(param_name)
-                except Exception as e:
-                    if type(e) is DerivingArgsError:
-                        raise
+        looking_in = ctx.get('config', ctx)  # Gracefully handle Configs (not usual Contexts)
+        for key in self.path_keys:
+            try:
+                looking_in = looking_in[key]
+            except (KeyError, AttributeError) as e:
+                msg = "while traversing path {!r} for {}() args.".format(self.func.ctx_path, func_name),
+                if user_passed_path:
                     reraise_with_context(
                         e,
-                        "in {!r} step of deriving args for param {!r} of {}()".format(
-                            p.__name__, param_name, func_name
-                        ),
+                        msg,
                         DerivingArgsError
                     )
-                if passing is not fell_through:
-                    debug("{}(): {} found value {:.25}... for param {!r}".format(
-                        func_name, p.__name__, str(passing), param_name)
-                    )
-                    break
                 else:
-                    debug("{}(): {} failed to find value for param {!r}".format(func_name, p.__name__, param_name))
+                    debug("Ignoring %r %s", type(e).__name__, msg)
+                    return {}
+        return looking_in
 
-            if passing is not fell_through:
+    def bind(self, args, kwargs):
+        """Returns the kwargs to call func with, given what the caller passed."""
+        func_name = self.func_name
+        derive_kwargs = self.derive_kwargs
+        param_name_to_callable_default = self.param_name_to_callable_default
+
+        # Will throw here if too many args/kwargs
+        directly_passed = get_directly_passed(self.func, self.sig, args, kwargs)
+
+        # Task.__call__ will error before us if ctx wasn't passed
+        # Might want a non-task to be skippable, so just try to carry on without ctx.
+        ctx = args[0] if args else None
+
+        ctx_argdict = derived = _MISSING
+
+        # Decide through cascading what to use as the value for each parameter.
+        # Steps are inlined rather than closures so a call doesn't have to build them.
+        args_passing = {}
+        for param_name in self.param_names:
+            # First, positionals and kwargs
+            step = "get_directly_passed_arg"
+            passing = directly_passed.pop(param_name, _MISSING)
+            try:
+                # Then check ctx
+                if passing is _MISSING:
+                    step = "get_from_ctx"
+                    # Walk the path once per call, even if it led to an empty dict.
+                    if ctx_argdict is _MISSING:
+                        ctx_argdict = self.traverse_path_for_argdict(ctx)
+                    passing = ctx_argdict.get(param_name, _MISSING)
+                # Not really used/tested
+                if passing is _MISSING and derive_kwargs:
+                    step = "call_derive_kwargs_or_error"
+                    # Once per call, even if it handed back an empty dict.
+                    if derived is _MISSING:
+                        derived = derive_kwargs(ctx)
+                    passing = derived.get(param_name, _MISSING)
+                if passing is _MISSING and param_name in param_name_to_callable_default:
+                    step = "call_callable_default"
+                    passing = param_name_to_callable_default[param_name](ctx)
+            except Exception as e:
+                if type(e) is DerivingArgsError:
+                    raise
+                reraise_with_context(
+                    e,
+                    "in {!r} step of deriving args for param {!r} of {}()".format(
+                        step, param_name, func_name
+                    ),
+                    DerivingArgsError
+                )
+
+            if passing is not _MISSING:
+                debug("%s(): %s found value %.25s... for param %r", func_name, step, passing, param_name)
                 args_passing[param_name] = passing
+            else:
+                debug("%s(): failed to find value for param %r", func_name, param_name)
 
-        # Now, bind and supply defaults to see if any are still missing.
-        # Partial bind and then error because funcsigs error msg succ.
-        ba = sig.bind_partial(**args_passing)
-        # getcallargs isn't there on funcsig version.
-        missing = []
-        for param in sig.parameters.values():
-            if param.name not in ba.arguments and param.default is param.empty:
-                missing.append(param.name)
+        # Now see if any required params are still missing. args_passing is keyed by
+        # param name already, so no need to bind_partial it all over again.
+        # Error ourselves because funcsigs error msg succ.
+        missing = [
+            param_name
+            for param_name in self.required_param_names
+            if param_name not in args_passing
+        ]
         # TODO contribute these improved error messages back to funcsigs
         if missing:
             msg = ("{!r} did not receive required positional arguments: {!r}. "
@@ -332,33 +384,11 @@ def get_params_from_ctx(func=None, path=None, derive_kwargs=None):
                 ", ".join(
                     missing
                 ),
-                '{}.{}'.format(func.ctx_path, param_name)
+                '{}.{}'.format(self.func.ctx_path, param_name)
             )
             raise TypeError(msg)
 
-        # Now that we've generated a kwargs dict that is everything we know about how to call
-        # this function, call it!
-        # debug("Derived params {}".format({a: v for a, v in args_passing.items()
-        # if a != 'ctx' and a != 'c'}))
-        # TODO We get an 'unexpected kwarg clean' here in Py2 if try to use it.
-        # Funcsigs bug of not respecting __signature__? Review both sources
-        return func(**args_passing)
-
-    # myparams = (ctx=None, arg1=None, optionalarg1=olddefault)
-    myparams = [
-        p.replace(default=None) if p.default is p.empty else p
-        for p in sig.parameters.values()
-    ]
-    if not myparams or myparams[0].name not in names_for_ctx:
-        raise ValueError("Can't have a derive_kwargs_from_ctx function that doesn't have a context arg!")
-    # Don't provide default for ctx
-    myparams[0] = list(sig.parameters.values())[0]
-    mysig = sig.replace(parameters=myparams)
-    generated_function = customized_default_decorator
-    generated_function.__signature__ = mysig
-    # print('sig here ', mysig.parameters)
-
-    return generated_function
+        return args_passing
 
 
 InputPath = "input"
@@ -371,17 +401,43 @@ def _get_full_name(func):
     )
 
 
+# blake2b is faster than sha2 and plenty for a local freshness cache. Py2 only has sha2.
+try:
+    _new_hasher = partial(hashlib.blake2b, digest_size=16)
+except AttributeError:
+    _new_hasher = hashlib.sha224
+
+
 def _hash_str(obj):
-    return hashlib.sha224(bytes(obj)).hexdigest()
+    return _new_hasher(bytes(obj)).hexdigest()
 
 
-def _hash_int(obj):
-    return int(_hash_str(obj), 16)
+def _to_list_if_not_already(val):
+    """
+    >>>to_list_if_not_already('xyz')
+    ['xyz']
+    >>>to_list_if_not_already(['xyz'])
+    ['xyz']
+    """
+    if not isinstance(val, (list, tuple)):
+        # I don't like checking types explicitly in python, but I can't think of a more
+        # reliable way that wouldn't include strings in py2.
+        return [val]
+    else:
+        return val
 
 
-class CallInfo(object):
+class CallSpec(object):
+    """Everything about a function's calls that doesn't depend on the call's arguments.
+    Worked out once per decorated function; see CallInfo for the per-call half."""
+
+    __slots__ = (
+        "name", "code_hash", "sig", "output_params", "input_params",
+        "params_that_are_filenames", "params_modify_behavior",
+    )
+
     def __repr__(self):
-        return "CallInfo({!r})".format(self.name)
+        return "CallSpec({!r})".format(self.name)
 
     def __init__(self, func):
         self.name = _get_full_name(func)
@@ -403,13 +459,8 @@ class CallInfo(object):
         )
         sig = signature(func)
         self.sig = sig
-        self.params_that_are_filenames = []
-        self.output_params = self._look_for_params_with(
-            OutputPath, [str(OutputPath)]
-        )
-        self.input_params = self._look_for_params_with(
-            InputPath, [str(InputPath), "path", "file"]
-        )
+        self.output_params, self.input_params = self._classify_params()
+        self.params_that_are_filenames = self.output_params + self.input_params
         self.params_modify_behavior = [
             param_name
             for param_name in self.sig.parameters
@@ -419,34 +470,82 @@ class CallInfo(object):
             and param_name not in self.input_params
         ]
         debug(
-            "For func {!r}, detected signature: "
-            "input_params: {!r}, "
-            "output_params: {!r}, "
-            "params_modify_behavior: {!r}".format(
-                self.name,
-                self.input_params,
-                self.output_params,
-                self.params_modify_behavior,
-            )
+            "For func %r, detected signature: "
+            "input_params: %r, "
+            "output_params: %r, "
+            "params_modify_behavior: %r",
+            self.name,
+            self.input_params,
+            self.output_params,
+            self.params_modify_behavior,
         )
 
+    def _classify_params(self):
+        """Find params that look like filenames, in one pass over the signature.
+
+        :returns: (output_params, input_params). A param that looks like both is an output.
+        """
+        output_params, input_params = [], []
+        for param_name, param in self.sig.parameters.items():
+            if param_name in ("ctx", "c"):
+                continue
+            # Assume whole list is of one type, that is List<type(list[0])>.
+            # Don't write more complex annotations than that, please :)
+            annotation = _to_list_if_not_already(param.annotation)[0]
+            lowered, private = param_name.lower(), param_name.startswith("_")
+            if self._looks_like(lowered, private, annotation, OutputPath, self._output_words):
+                output_params.append(param_name)
+            elif self._looks_like(lowered, private, annotation, InputPath, self._input_words):
+                input_params.append(param_name)
+        return output_params, input_params
+
+    _output_words = (str(OutputPath),)
+    _input_words = (str(InputPath), "path", "file")
+
+    @staticmethod
+    def _looks_like(lowered_name, private, annotation, type_annotation, words_to_match):
+        # An explicit annotation counts even on a _param; guessing from the name doesn't.
+        if annotation is type_annotation:
+            return True
+        if private:
+            return False
+        for w in words_to_match:
+            if w in lowered_name:
+                return True
+        return False
+
+
+class CallInfo(object):
+    """One call of a skippable function: its bound arguments, flags and paths.
+    Checkers are free to attach their own per-call state to it."""
+
+    def __repr__(self):
+        return "CallInfo({!r})".format(self.name)
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.name = spec.name
+        self.code_hash = spec.code_hash
+        self._hash = None
+
     def bind(self, args, kwargs):
         # bind here to throw error for too many arguments...
-        ba = self.sig.bind(*args, **kwargs)
+        spec = self.spec
+        ba = spec.sig.bind(*args, **kwargs)
         # Since we don't have getcallargs on Py2
         self.ba = ba
-        for param in self.sig.parameters.values():
+        for param in spec.sig.parameters.values():
             if param.name not in ba.arguments:
                 ba.arguments[param.name] = param.default
 
         self.flags = [
             (param_name, argument_value)
             for param_name, argument_value in self.ba.arguments.items()
-            if param_name in self.params_modify_behavior
+            if param_name in spec.params_modify_behavior
         ]
         # Input_paths gets mutated later!
-        self.output_paths = self._coerce_paths(self.output_params, self.flags)
-        self.input_paths = self._coerce_paths(self.input_params, self.flags)
+        self.output_paths = self._coerce_paths(spec.output_params, self.flags)
+        self.input_paths = self._coerce_paths(spec.input_params, self.flags)
 
     def identify(self, include_files):
         """Things that make this function call unique."""
@@ -457,24 +556,15 @@ class CallInfo(object):
         yield self.code_hash  # This is what should cause code to re-run if modified
 
     def persistent_hash(self):
-        return sum(_hash_int(x.encode('utf-8')) for x in self.identify(True))
-
-    def persistent_hash_no_files(self):
-        return sum(_hash_int(x.encode('utf-8')) for x in self.self.identify(False))
-
-    def _to_list_if_not_already(self, val):
-        """
-        >>>to_list_if_not_already('xyz')
-        ['xyz']
-        >>>to_list_if_not_already(['xyz'])
-        ['xyz']
-        """
-        if not (isinstance(val, list) or isinstance(val, tuple)):
-            # I don't like checking types explicitly in python, but I can't think of a more
-            # reliable way that wouldn't include strings in py2.
-            return [val]
-        else:
-            return val
+        """Hex digest of everything that identifies this call. Same across runs."""
+        if self._hash is None:
+            # One hasher fed piece by piece, rather than a hash per piece summed up.
+            hasher = _new_hasher()
+            for x in self.identify(True):
+                hasher.update(x.encode('utf-8'))
+                hasher.update(b'\0')
+            self._hash = hasher.hexdigest()
+        return self._hash
 
     type_check_help = dedent("""
     Add a '_' to beginning of parameter {}'s name to avoid this type-check
@@ -488,7 +578,7 @@ class CallInfo(object):
         returning_paths = []
         for name in param_names:
             runtime_value = self.ba.arguments[name]
-            paths = self._to_list_if_not_already(runtime_value)
+            paths = _to_list_if_not_already(runtime_value)
             # Try to coerce before timestamp_differ to avoid cryptic error
             rejected_values = []
             for p in paths:
@@ -512,27 +602,6 @@ class CallInfo(object):
 
         return returning_paths
 
-    def _look_for_params_with(self, type_annotation, words_to_match):
-        """If param name looks like a filename, returns its arg value."""
-        returning = []
-        for param_name in self.sig.parameters:
-            if param_name in ["ctx", "c"]:
-                continue
-            # Assume whole list is of one type, that is List<type(list[0])>.
-            # Don't write more complex annotations than that, please :)
-            annotation = self._to_list_if_not_already(
-                self.sig.parameters[param_name].annotation
-            )[0]
-            if (
-                annotation
-                and annotation is type_annotation
-                or any(w in param_name.lower() for w in words_to_match)
-                and not param_name.startswith("_")
-            ) and param_name not in self.params_that_are_filenames:
-                self.params_that_are_filenames.append(param_name)
-                returning.append(param_name)
-        return returning
-
 
 class FileTimestampChecker(object):
     """
@@ -540,6 +609,8 @@ class FileTimestampChecker(object):
     This checker doesn't maintain any state, so most call-backs just return none.
     """
 
+    __slots__ = ()
+
     def can_skip(self, ci):
         res = timestamp_differ(ci.input_paths, ci.output_paths)
         return SkipResult(res[0], res[1])
@@ -560,46 +631,77 @@ class FileFlagChecker(object):
     Also writes a file for each output file that denotes the last flags used to create that file.
     """
 
-    def _gen_call_str(self, ci):
-        """Returns a string which summarizes the function call. I.e.:
+    __slots__ = ("_call_strs",)
+
+    # Shared by every checker; (cache root, output path str) -> where its flags get written.
+    _flags_paths = {}
+    _max_flags_paths = 128
+
+    # Only flags of these types are remembered by _get_call_str, since their repr
+    # can't change behind our back. Anything else is re-hashed every call.
+    _immutable_flag_types = frozenset((type(None), bool, int, float, str, bytes, type(u"")))
+    _max_call_strs = 128
+
+    def __init__(self):
+        # (task, flags) -> hashed call str, for calls we've already seen in this process.
+        self._call_strs = {}
+
+    def _gen_call_str_parts(self, ci):
+        """Yields the pieces (as bytes) of a string which summarizes the function call. I.e.:
         fib(6) would result in callstr:
-        task=fib\nflags=param0:6
+        task=fib\nflags=param0:6,
 
         Must be same across runs or cache will reject. All values must have a __repr__.
         """
-        call_str = "task={}\nflags={}".format(
-            ci.name + ci.code_hash,
-            ", ".join(
-                "{}:{!r}".format(param_name, argument_value)
-                for param_name, argument_value in ci.flags
-            )
-        )
-        return call_str
+        yield "task={}\nflags=".format(ci.name + ci.code_hash).encode('utf-8')
+        for param_name, argument_value in ci.flags:
+            yield "{}:{!r}, ".format(param_name, argument_value).encode('utf-8')
 
     def _get_hashed_call_str(self, ci):
-        """Provides minimal security, minimizes file-size on calls with big params."""
-        hashed_call_str = _hash_str(self._gen_call_str(ci).encode('utf-8'))
-        debug("Determined hashed_call_str {!r} for {!r}".format(hashed_call_str, ci))
+        """Provides minimal security, minimizes file-size on calls with big params.
+        The call str is streamed into the hasher, so it's never built in one piece."""
+        hasher = _new_hasher()
+        for part in self._gen_call_str_parts(ci):
+            hasher.update(part)
+        hashed_call_str = hasher.hexdigest()
+        debug("Determined hashed_call_str %r for %r", hashed_call_str, ci)
         return hashed_call_str
 
+    def _get_call_str(self, ci):
+        """The encoded _get_hashed_call_str, remembered when all flags are simple immutable values."""
+        immutable_types = self._immutable_flag_types
+        if not all(type(value) in immutable_types for _, value in ci.flags):
+            return self._get_hashed_call_str(ci).encode()
+
+        # type() in the key so that e.g. flag=1 and flag=True, which hash equal, stay apart.
+        key = (ci.name, ci.code_hash, tuple((name, type(value), value) for name, value in ci.flags))
+        call_str = self._call_strs.get(key)
+        if call_str is None:
+            if len(self._call_strs) >= self._max_call_strs:
+                self._call_strs.clear()
+            call_str = self._call_strs[key] = self._get_hashed_call_str(ci).encode()
+        return call_str
+
     def _get_cache_path(self, ci):
         """Returns the Path at which can find the previously written return value, if written before."""
-        return CachePath(".minv", ci.name, str(ci.persistent_hash()))
+        return CachePath(".minv", ci.name, ci.persistent_hash())
 
     def _check_output_paths(self, ci):
         """Check that all output files were generated with the same flags as this call to the function."""
         failed_path, old_flags = None, 'Not yet written'
         for output_path in ci.output_paths:
-            if not output_path.exists():
+            if not os.path.exists(str(output_path)):
                 return SkipResult(
                     False, "output {!r} doesn't exist yet".format(output_path)
                 )
             flags_path = self._file_path_for_path(output_path)
             # debug("Checking {!r} for {!r}".format(flags_path, call_str))
-            if not flags_path.exists():
+            # Just try to read it; a missing sidecar fails the read, no separate stat needed.
+            try:
+                contents = flags_path.read_bytes()
+            except (IOError, OSError):
                 failed_path = output_path
                 break
-            contents = flags_path.read_bytes()
             if contents != ci._call_str:
                 failed_path = output_path
                 old_flags = contents
@@ -628,7 +730,7 @@ class FileFlagChecker(object):
         # adding to the output_paths
         ci._return_val_path = self._get_cache_path(ci)
         # Hash of all of the arguments used in this function call, for checking against output_files.
-        ci._call_str = self._get_hashed_call_str(ci).encode()
+        ci._call_str = self._get_call_str(ci)
 
         ci.output_paths.append(ci._return_val_path)
 
@@ -645,8 +747,19 @@ class FileFlagChecker(object):
           4. A database lol
 
         We go with 3 here.
+
+        Memoized per path (for a bounded number of paths), so the hash and CachePath's
+        parent-dir creation usually only happen the first time we see a path.
+        Keyed on the cache root too, so moving ``cachepath.location`` moves the sidecars.
         """
-        return CachePath(".minv", _hash_str(path))
+        key = (cachepath.location, str(path))
+        flags_paths = self._flags_paths
+        flags_path = flags_paths.get(key)
+        if flags_path is None:
+            if len(flags_paths) >= self._max_flags_paths:
+                flags_paths.clear()
+            flags_path = flags_paths[key] = CachePath(".minv", _hash_str(path))
+        return flags_path
 
     def clean(self, ci):
         for path in ci.output_paths:
@@ -662,22 +775,29 @@ class FileFlagChecker(object):
         """Write the flags used to generate each output file to a file per output file."""
         for path in ci.output_paths:
             fp_for_path = self._file_path_for_path(path)
-            debug("Logging flags for {!r} to {!r}".format(path, fp_for_path))
-            fp_for_path.write_bytes(ci._call_str)
+            debug("Logging flags for %r to %r", path, fp_for_path)
+            try:
+                fp_for_path.write_bytes(ci._call_str)
+            except (IOError, OSError):
+                # The memoized path skipped CachePath's mkdir; .minv may have been removed since.
+                fp_for_path.parent.mkdir(parents=True, exist_ok=True)
+                fp_for_path.write_bytes(ci._call_str)
 
 
     def _persist_return_val(self, ci):
         """Persist the return value of the function to the function's file."""
         try:
-            pickle.dump(ci.result, ci._return_val_path.open("wb"))
-            log.info("Done logging return value for {}() to {}. ".format(ci.name, ci._return_val_path))
+            # Pickle to bytes first so a value that can't be pickled leaves no
+            # truncated file behind, and the file is closed as soon as it's written.
+            ci._return_val_path.write_bytes(pickle.dumps(ci.result, pickle.HIGHEST_PROTOCOL))
+            log.info("Done logging return value for %s() to %s. ", ci.name, ci._return_val_path)
         except Exception as e:
             raise SaveReturnvalueError(*e.args)
 
     def load(self, ci):
         """Called to load the return value of the function, if can_skip."""
-        log.info("Loading return value for {!r} from {!r}".format(ci.name, ci._return_val_path))
-        return pickle.load(ci._return_val_path.open("rb"))
+        log.info("Loading return value for %r from %r", ci.name, ci._return_val_path)
+        return pickle.loads(ci._return_val_path.read_bytes())
 
 
 def _is_task(o):
@@ -812,23 +932,25 @@ class SkippableDecorator(object):
     def attach_to_func(self, func):
         self._add_our_kwargs(func)
         self.func = func
+        # After _add_our_kwargs, so the spec sees the same signature calls are bound against.
+        self.spec = CallSpec(func)
 
     def _clean_if_necessary(self, clean, ci, kwargs_d):
         if not clean:
             return
 
         # Clean the output paths of the function.
-        log.info("Cleaning {!r}: {!r}!".format(ci.name, ci.output_paths))
+        log.info("Cleaning %r: %r!", ci.name, ci.output_paths)
         for p in ci.output_paths:
             p.rm()
         # Tell the checker to clean any of its files.
         for checker in self.checkers:
             checker.clean(ci)
-        debug("Cleaned all {} output files!".format(len(ci.output_paths)))
+        debug("Cleaned all %s output files!", len(ci.output_paths))
 
     def __call__(self, func, *args, **kwargs):
         """Call the function if required, otherwise return what was returned last time."""
-        ci = CallInfo(self.func)
+        ci = CallInfo(self.spec)
         # If someone passed these args to the function, they were meant for us.
         force_run = kwargs.pop("_force_run", False)
         clean = kwargs.pop("_clean", False)
@@ -836,27 +958,25 @@ class SkippableDecorator(object):
 
         self._clean_if_necessary(clean, ci, kwargs)
 
-        debug("for func {}, inputs: {} outputs: {}".format(ci.name, ci.input_paths, ci.output_paths))
+        debug("for func %s, inputs: %s outputs: %s", ci.name, ci.input_paths, ci.output_paths)
         # Not necessary in Python, but makes clear that leak from loop is intentional :-)
         failing_result, check_result, first_approved_checker = None, None, None
         for checker in self.checkers:
             check_result = checker.can_skip(ci)
-            if check_result:
-                if not check_result.skippable:
-                    failing_result = check_result
-                    break
-                elif first_approved_checker is None:
-                    first_approved_checker = checker
+            if not check_result.skippable:
+                failing_result = check_result
+                break
+            elif first_approved_checker is None:
+                first_approved_checker = checker
 
         # Just use the logs from last checker if no one complained and forced a run
         # No checkers is not a supported use-case.
         result = failing_result if failing_result is not None else check_result
         debug(
-            "{}skipping {!r} because {}".format(
-                "not " if not result.skippable else "",
-                func.__name__,
-                result.reason,
-            )
+            "%sskipping %r because %s",
+            "not " if not result.skippable else "",
+            func.__name__,
+            result.reason,
         )
 
         if failing_result is None and not force_run:
@@ -866,7 +986,7 @@ class SkippableDecorator(object):
                 # Never seen this happen, but I imagine we would rather degrade
                 # to calling the function again rather than quitting or returning
                 # a bad value.
-                log.warning("Failed to load cached result for {!r}: {!r}".format(ci.name, e))
+                log.warning("Failed to load cached result for %r: %r", ci.name, e)
 
         ci.result = func(*args, **kwargs)
         for checker in self.checkers:
@@ -879,8 +999,7 @@ def timestamp_differ(input_filenames, output_filenames):
     """
     :returns: Two-tuple:
       [0] -- True if all input files are older than output files and all files exist
-      [1] -- Path of youngest input.
-      [2] -- Why we're able to skip (or not).
+      [1] -- Why we're able to skip (or not).
     """
     # Always run things that don't produce a file
     if not output_filenames:
@@ -899,32 +1018,52 @@ def timestamp_differ(input_filenames, output_filenames):
     # run the task. We run when missing inputs because hopefully
     # their task will error out and notify the user, rather than silently
     # ignore that it was supposed to do something.
-    paths = itertools.chain(input_filenames, output_filenames)
-    for p in paths:
-        if not Path(p).exists():
-            # HACK Not the youngest input, but it currently doesn't matter
+    # One stat per path serves as both the existence check and the mtime lookup.
+    # Outputs go first so that we can stop at the first input that is too new.
+    oldest_output = None  # (path, modified)
+    for p in output_filenames:
+        modified = _mtime(p)
+        if modified is None:
             return False, "{} missing".format(p)
+        if oldest_output is None or modified < oldest_output[1]:
+            oldest_output = (p, modified)
     if not input_filenames:
         return True, "task's outputs exist, but no inputs required"
 
-    # All exist, now make sure oldest output is older than youngest input.
-    PathInfo = collections.namedtuple("PathInfo", ["path", "modified"])
-
-    def sort_by_timestamps(l_param):
-        l = (PathInfo(path, Path(path).stat().st_mtime) for path in l_param)
-        return sorted(l, key=lambda pi: pi.modified)
+    youngest_input = None  # (path, modified)
+    for p in input_filenames:
+        modified = _mtime(p)
+        if modified is None:
+            return False, "{} missing".format(p)
+        if modified >= oldest_output[1]:
+            return (
+                False,
+                "input={} is not older than oldest_output={}".format(
+                    (p, modified), oldest_output
+                ),
+            )
+        if youngest_input is None or modified > youngest_input[1]:
+            youngest_input = (p, modified)
 
-    oldest_output = sort_by_timestamps(output_filenames)[0]
-    youngest_input = sort_by_timestamps(input_filenames)[-1]
-    skipping = youngest_input.modified < oldest_output.modified
+    # All exist, and even the youngest input is older than the oldest output.
     return (
-        skipping,
+        True,
         "youngest_input={}, oldest_output={}".format(
             youngest_input, oldest_output
         ),
     )
 
 
+def _mtime(path):
+    """Modified time of path, or None if it doesn't exist."""
+    try:
+        st = os.stat(str(path))
+    except OSError:
+        return None
+    # Integer nanoseconds where we have them (not on Py2), so no float rounding.
+    return getattr(st, "st_mtime_ns", st.st_mtime)
+
+
 def get_directly_passed(func, sig, args, kwargs):
     """Matches up *args and **kwargs to the variable names that the function expects.
     >>>def mytest(ctx, required0, named0=None):
@@ -1003,40 +1142,36 @@ def magictask(*args, **kwargs):
     klass = kwargs.pop("klass", Task)
     collection = kwargs.pop("collection", None)
     _skippable = kwargs.pop("skippable", False)
-    get_params_args = {
-        arg: kwargs.pop(arg, None) for arg in ("params_from", "derive_kwargs")
-    }
-    get_params_args["path"] = get_params_args.pop("params_from", None)
+    get_params_args = {}
+    if kwargs:  # Plain @magictask/@ns.magictask has nothing left; don't bother popping.
+        get_params_args["path"] = kwargs.pop("params_from", None)
+        get_params_args["derive_kwargs"] = kwargs.pop("derive_kwargs", None)
 
     # @task -- no options were (probably) given.
     if len(args) == 1 and callable(args[0]) and not isinstance(args[0], Task):
-        if _skippable:
-            t = klass(get_params_from_ctx(skippable(args[0])), **kwargs)
-        else:
-            t = klass(get_params_from_ctx(args[0]), **kwargs)
-        if collection is not None:
-            collection.add_task(t)
-        return t
+        return _compose_get_params_then_task(
+            args[0], klass, collection, _skippable, get_params_args, kwargs
+        )
 
     # @task(options)
     def inner(inner_obj):
-        if _skippable:
-            obj = klass(
-                get_params_from_ctx(skippable(inner_obj), **get_params_args),
-                **kwargs
-            )
-        else:
-            obj = klass(
-                get_params_from_ctx(inner_obj, **get_params_args), **kwargs
-            )
-
-        if collection is not None:
-            collection.add_task(obj)
-        return obj
+        return _compose_get_params_then_task(
+            inner_obj, klass, collection, _skippable, get_params_args, kwargs
+        )
 
     return inner
 
 
+def _compose_get_params_then_task(func, klass, collection, _skippable, get_params_args, task_kwargs):
+    """Builds the ``@task @get_params_from_ctx [@skippable]`` stack for magictask."""
+    if _skippable:
+        func = skippable(func)
+    t = klass(get_params_from_ctx(func, **get_params_args), **task_kwargs)
+    if collection is not None:
+        collection.add_task(t)
+    return t
+
+
 def _ns_task(self, *args, **kwargs):
     # @task -- no options were (probably) given.
     if len(args) == 1 and callable(args[0]) and not isinstance(args[0], Task):
@@ -1,3 +1,5 @@
+import sys
+
 from magicinvoke import Collection, Lazy, Path
 
 ns = Collection()
@@ -25,11 +27,14 @@ def get_peoples_ages(ctx,
 ):
     results = []
     print("get_peoples_ages called")
-    for name in Path(names_path).read_text().splitlines():
-        print("Getting age for {}".format(name))
-        # We can pretend this is an expensive processing step where we pull
-        # some numbers from a DB :)
-        results.append((name, 39))
+    # Go line by line rather than reading the whole file in at once.
+    with open(str(names_path)) as names:
+        for name in names:
+            name = name.rstrip("\r\n")
+            print("Getting age for {}".format(name))
+            # We can pretend this is an expensive processing step where we pull
+            # some numbers from a DB :)
+            results.append((name, 39))
     print("Done pulling results!")
     return results
 
@@ -38,8 +43,10 @@ def get_peoples_ages(ctx,
 def print_peoples_ages(ctx):
     print("print_peoples_ages called")
     names_and_ages = get_peoples_ages(ctx)
-    for tup in names_and_ages:
-        print("{name}'s age is {age}".format(name=tup[0], age=tup[1]))
+    # Hand stdout all the lines at once rather than one print per person.
+    sys.stdout.writelines(
+        "{}'s age is {}\n".format(name, age) for name, age in names_and_ages
+    )
     print("Done!")
 
 
@@ -1,7 +1,9 @@
-import itertools
+import contextlib
+import io
 from textwrap import dedent
 
 from magicinvoke import (
+    Program,
     magictask,
     get_params_from_ctx,
     InputPath,
@@ -24,8 +26,12 @@ def write_all_the_programs(
 @magictask(params_from="ctx.mycompileinfo", skippable=True)
 def mycompile(ctx, cfiles, objectfiles: [OutputPath]):
     """Then compile them"""
-    for c, o in zip(cfiles, objectfiles):
-        ctx.run("gcc -c {} -o {}".format(c, o))
+    # One shell for all of them, rather than one per file.
+    ctx.run(
+        " && ".join(
+            "gcc -c {} -o {}".format(c, o) for c, o in zip(cfiles, objectfiles)
+        )
+    )
 
 
 @magictask(params_from="ctx.mycompileinfo", pre=[mycompile], skippable=True)
@@ -55,16 +61,30 @@ def touch(ctx, cfiles):
     This task provided so that you can poke the files yourself and see that we
     only run the tasks that are necessary :)
     """
-    for f in cfiles:
-        ctx.run("touch {}".format(f))
+    ctx.run("touch " + " ".join(str(f) for f in cfiles))
 
 
 @magictask(params_from="ctx.mycompileinfo")
 def clean(ctx, cfiles, objectfiles, executable_path):
-    removing = " ".join(
-        str(p) for p in itertools.chain(cfiles, objectfiles, [executable_path])
-    )
-    ctx.run("rm {}".format(removing), warn=True)
+    removing = list(cfiles) + list(objectfiles) + [executable_path]
+    ctx.run("rm -f " + " ".join(str(p) for p in removing))
+
+
+def invoke_here(command, warn=False):
+    """
+    Runs ``invoke ...`` in this process rather than a new one, returning its stdout.
+    Like ``ctx.run``, a nonzero exit is an error unless ``warn``.
+    """
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        try:
+            Program().run(command)
+        except SystemExit as e:
+            if e.code and not warn:
+                raise AssertionError(
+                    "{!r} exited {}:\n{}".format(command, e.code, out.getvalue())
+                )
+    return out.getvalue()
 
 
 @magictask
@@ -73,9 +93,7 @@ def test(ctx):
     # Whole pipeline should run when c sources change.
     expected_stdout = dedent(
         """
-        gcc -c ws/a.c -o ws/a.o
-        gcc -c ws/b.c -o ws/b.o
-        gcc -c ws/c.c -o ws/c.o
+        gcc -c ws/a.c -o ws/a.o && gcc -c ws/b.c -o ws/b.o && gcc -c ws/c.c -o ws/c.o
         gcc -o ws/produced_executable ws/a.o ws/b.o ws/c.o
         ws/produced_executable
         """
@@ -85,8 +103,7 @@ def test(ctx):
     clean(ctx)
     write_all_the_programs(ctx)
 
-    res = ctx.run("invoke run", warn=True)
-    assert expected_stdout.strip() == res.stdout.strip()
+    assert expected_stdout.strip() == invoke_here("invoke run", warn=True).strip()
 
     # Test 2, Only last step should run if next to last step's output changed.
     expected_stdout = dedent(
@@ -96,7 +113,6 @@ def test(ctx):
         """
     )
     ctx.run("touch {}".format(ctx.mycompileinfo.objectfiles[0]))
-    res = ctx.run("invoke run", warn=True)
-    assert expected_stdout.strip() == res.stdout.strip()
+    assert expected_stdout.strip() == invoke_here("invoke run", warn=True).strip()
 
     print("All tests succeeded.")
@@ -3,6 +3,7 @@ import os
 import sys
 import termios
 
+from invoke import Context
 from invoke.vendor.six import iteritems
 import pytest
 from mock import patch
@@ -72,3 +73,12 @@ def mock_termios():
         mocked.VMIN = termios.VMIN
         mocked.VTIME = termios.VTIME
         yield mocked
+
+
+@pytest.fixture(scope="session")
+def base_ctx():
+    """
+    A default `.Context`, built once per session. Don't change its config;
+    tests that need to should make their own.
+    """
+    return Context()
@@ -1,8 +1,16 @@
 from magicinvoke import magictask, task, get_params_from_ctx, _disable_logging_for_tests
 from magicinvoke.exceptions import DerivingArgsError
-from cachepath import CachePath
+from magicinvoke.magicinvoke import FileFlagChecker
+import cachepath
+from cachepath import CachePath, Path
 from invoke import Context, Config
 from invoke.config import Lazy
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
 import six
 
 import pytest
@@ -10,37 +18,36 @@ import pytest
 
 _disable_logging_for_tests()
 
-def forgot_ctx():
-    with pytest.raises(TypeError):
-
-        @task
-        def _bad_test_task(*args, **kwargs):
-            pass
+def _decorate_without_ctx():
+    @task
+    def _bad_test_task(*args, **kwargs):
+        pass
 
-    with pytest.raises(TypeError):
 
-        @task
-        def _bad_test_task_2(ctx, *args, **kwargs):
-            pass
+def _call_without_ctx():
+    @task
+    def _bad_test_task_2(ctx, *args, **kwargs):
+        pass
 
-        _bad_test_task_2("x")
+    _bad_test_task_2("x")
 
 
-@pytest.fixture
-def ctx():
-    return Context()
+@pytest.mark.parametrize("forget_ctx", [_decorate_without_ctx, _call_without_ctx])
+def test_forgot_ctx(forget_ctx):
+    with pytest.raises(TypeError):
+        forget_ctx()
 
 
-def args_kwargs(ctx):
+def args_kwargs(base_ctx):
     @task
     def _test_task(ctx, *args, **kwargs):
         return args, kwargs
 
-    r = _test_task(ctx, "hi", mykwarg="hi")
+    r = _test_task(base_ctx, "hi", mykwarg="hi")
     assert "hi" in r[0] and "mykwarg" in r[1]
 
 
-def expand_ctx(ctx):
+def expand_ctx():
     ctx = Context(Config({"magic": {"test_task": {"x": 1, "y": 2}}}))
     # Dirty remap since qualname on py3 does a better job.
     ctx.magic.expand_ctx = {"<locals>": {"test_task": lambda ctx: ctx.magic.test_task}}
@@ -53,37 +60,35 @@ def expand_ctx(ctx):
     assert r[0] == 1 and r[1] == 2
 
 
-def expand_ctx_path():
-    ctx = Context(Config({"random": {"test_task": {"x": 1, "y": 2}}}))
+@magictask(params_from="ctx.random.test_task")
+def _from_nested_path(ctx, x, y=None):
+    return x, y
 
-    @magictask(params_from="ctx.random.test_task")
-    def test_task(ctx, x, y=None):
-        return x, y
-
-    r = test_task(ctx)
-    assert r[0] == 1 and r[1] == 2
 
+@magictask(params_from="ctx")
+def _with_callable_default(ctx, x, y=lambda ctx: ctx.z):
+    return x, y
 
-def callable_default():
-    ctx = Context(Config({"x": 1, "z": 2}))
-
-    @magictask(params_from="ctx")
-    def test_task(ctx, x, y=lambda ctx: ctx.z):
-        return x, y
-
-    r = test_task(ctx)
-    assert r[0] == 1 and r[1] == 2
 
+@magictask(params_from="ctx")
+def _false_beats_default(ctx, x=True):
+    return x
 
-def proper_order_false():
-    ctx = Context(Config({"x": False}))
 
-    @magictask(params_from="ctx")
-    def test_task(ctx, x=True):
-        return x
+@pytest.mark.parametrize(
+    "config, func, expected",
+    [
+        # expand_ctx_path
+        ({"random": {"test_task": {"x": 1, "y": 2}}}, _from_nested_path, (1, 2)),
+        # callable_default
+        ({"x": 1, "z": 2}, _with_callable_default, (1, 2)),
+        # proper_order_false
+        ({"x": False}, _false_beats_default, False),
+    ],
+)
+def test_magictask_config_resolution(config, func, expected):
+    assert func(Context(Config(config))) == expected
 
-    r = test_task(ctx)
-    assert not r
 
 def test_task_without_ctx():
     @task(no_ctx=True)
@@ -91,7 +96,8 @@ def test_task_without_ctx():
         return
     assert test_task() is None
 
-def call_calls_pres():
+
+def call_calls_pres(base_ctx):
     global_d = {}
 
     @task
@@ -111,23 +117,24 @@ def call_calls_pres():
     def hi2(ctx):
         return
 
-    hi2(Context())
+    hi2(base_ctx)
     assert global_d["pre"] and global_d["post"] and global_d["skip_if"]
 
 
 from magicinvoke import skippable
 
 
-def test_class_methods_skippable():
-    class _MyClass(object):
-        @skippable
-        # @staticmethod
-        # TypeError: <staticmethod object> is not a callable object
-        # Python sucks sometimes :(
-        def func(self, val):
-            self.ran = True
-            return val
+class _SkippableClass(object):
+    @skippable
+    # @staticmethod
+    # TypeError: <staticmethod object> is not a callable object
+    # Python sucks sometimes :(
+    def func(self, val):
+        self.ran = True
+        return val
 
+
+def test_class_methods_skippable():
     def test_case(m0):
         assert not hasattr(m0, "ran")
         assert m0.func(True)
@@ -146,9 +153,9 @@ def test_class_methods_skippable():
 
     # Have to use non-temp objects to prevent interpreter giving us
     # same address (and thus same __repr__) for multiple "self"s.
-    m0 = _MyClass()
-    m1 = _MyClass()
-    m2 = _MyClass()
+    m0 = _SkippableClass()
+    m1 = _SkippableClass()
+    m2 = _SkippableClass()
 
     test_case(m0)
     test_case(m1)
@@ -159,23 +166,58 @@ def test_doesnt_call_non_lazy_ctx_values():
     c = Config(defaults={"bad": lambda x, y: True})
     assert c.bad(1, 2)
 
-class test_nice_errors_for_skippables():
-    def _raise_func(self, ctx):
-        raise ValueError('good!')
 
-    def test_raising_param_default(self):
-        @get_params_from_ctx
-        def myfunc(ctx, x=self._raise_func):
-            return x
+# Decorated once at import rather than in each test.
+def _raise_func(ctx):
+    raise ValueError('good!')
+
+
+@get_params_from_ctx
+def _raising_default(ctx, x=_raise_func):
+    return x
+
 
+@task
+@get_params_from_ctx
+def _lazy_from_cfg(cfg, x=Lazy('ctx.x')):
+    return x
+
+
+@magictask
+def _needs_x(ctx, x):
+    pass
+
+
+@get_params_from_ctx
+def _ctx_only(ctx):
+    pass
+
+
+@get_params_from_ctx(path='ctx')
+def _a_from_ctx(ctx, a):
+    pass
+
+
+@get_params_from_ctx(path='ctx.a.b.c')
+def _a_from_missing_path(ctx, a):
+    pass
+
+
+@get_params_from_ctx
+def _lazy_from_c(cfg, x=Lazy('c.x')):
+    return x
+
+
+_FLAGS_OUTPUT = CachePath('lol')
+
+
+class test_nice_errors_for_skippables():
+    def test_raising_param_default(self):
         with pytest.raises(DerivingArgsError):
-            myfunc()
+            _raising_default()
+
     def test_config_instead_context(self):
-        @task
-        @get_params_from_ctx
-        def myfunc(cfg, x=Lazy('ctx.x')):
-            return x
-        assert myfunc(Config(defaults={'x': True})) is True
+        assert _lazy_from_cfg(Config(defaults={'x': True})) is True
 
         # To test error msgs
         # @task
@@ -198,13 +240,10 @@ class test_nice_errors_for_skippables():
                 pass
         assert 'context arg' in str(exc.value)
 
-    def test_forgot_to_pass_ctx(self):
-        @magictask
-        def myfunc(ctx, x):
-            pass
+    def test_forgot_to_pass_ctx(self, base_ctx):
         with pytest.raises(TypeError) as exc:
-            myfunc(Context())
-        assert "myfunc' did not receive required positional arguments: 'x'" in str(exc)
+            _needs_x(base_ctx)
+        assert "_needs_x' did not receive required positional arguments: 'x'" in str(exc)
 
     def test_bad_path_to_skippable(self):
         @skippable
@@ -219,27 +258,21 @@ class test_nice_errors_for_skippables():
         # @get_params_from_ctx(myarg=Lazy('x.y.z'))
 
     def test_too_many_args(self):
-        @get_params_from_ctx
-        def mine(ctx):
-            pass
         with pytest.raises(TypeError) as e:
-            mine(x=2, y=3, z=4)
+            _ctx_only(x=2, y=3, z=4)
         assert 'unexpected keyword' in str(e) if six.PY3 else 'too many keyword' in str(e)
         with pytest.raises(TypeError) as e:
-            mine(1, 2, 3, 4)
-        assert 'mine(ctx) takes 1 arguments but 4 were given' in str(e)
+            _ctx_only(1, 2, 3, 4)
+        assert '_ctx_only(ctx) takes 1 arguments but 4 were given' in str(e)
 
-    def misc_test_coverage(self):
+    def misc_test_coverage(self, base_ctx):
         @skippable
         def optional_param(opt=1):
             pass
         optional_param()
 
-        @get_params_from_ctx(path='ctx')
-        def test(ctx, a):
-            pass
         with pytest.raises(DerivingArgsError) as e:
-            test(None)
+            _a_from_ctx(None)
         assert 'Cannot get dict from' in str(e.value)
 
         # assert 'did not receive required' in str(e.value)
@@ -250,11 +283,8 @@ class test_nice_errors_for_skippables():
                 pass
         assert 'must start with' in str(e.value)
 
-        @get_params_from_ctx(path='ctx.a.b.c')
-        def test(ctx, a):
-            pass
         with pytest.raises(DerivingArgsError) as e:
-            test(Context())
+            _a_from_missing_path(base_ctx)
         assert 'while traversing path' in str(e.value)
 
     def test_flags_change_recall(self):
@@ -262,19 +292,114 @@ class test_nice_errors_for_skippables():
         def build(output_path, flag=True):
             output_path.touch()
             return flag
-        p = CachePath('lol')
+        p = _FLAGS_OUTPUT
         assert build(p)
         assert not build(p, False)
 
     def test_can_pass_cfg(self):
-        @get_params_from_ctx
-        def myfunc(cfg, x=Lazy('c.x')):
-            return x
-        assert myfunc(Config(defaults={'x': True}))
+        assert _lazy_from_c(Config(defaults={'x': True}))
+
+
+class _FakeCallInfo(object):
+    def __init__(self, output_paths, call_str):
+        self.output_paths = output_paths
+        self._call_str = call_str
 
 
+def test_flags_paths_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(FileFlagChecker, "_flags_paths", {})
+    monkeypatch.setattr(FileFlagChecker, "_max_flags_paths", 2)
+    checker = FileFlagChecker()
+    for name in ("a", "b", "c"):
+        checker._file_path_for_path(Path(name))
+    assert 0 < len(FileFlagChecker._flags_paths) <= 2
+
+
+def test_flags_paths_follow_cache_location(monkeypatch, tmpdir):
+    checker = FileFlagChecker()
+    before = checker._file_path_for_path(Path("out.txt"))
+    monkeypatch.setattr(cachepath, "location", str(tmpdir))
+    after = checker._file_path_for_path(Path("out.txt"))
+    assert after != before
+    assert str(after).startswith(str(tmpdir))
+
+
+def test_flags_written_after_minv_removed(monkeypatch, tmpdir):
+    monkeypatch.setattr(cachepath, "location", str(tmpdir))
+    checker = FileFlagChecker()
+    flags_path = checker._file_path_for_path(Path("out.txt"))  # Memoized, so no mkdir next time
+    shutil.rmtree(str(tmpdir.join(".minv")))
+    checker._persist_per_output_path(_FakeCallInfo([Path("out.txt")], b"flags"))
+    assert flags_path.read_bytes() == b"flags"
+
 
 # ------ Integration-y tests; run the examples
+_EXAMPLE_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, "sites", "magic_docs", "examples", "{}"
+)
+
+
+def _run_in(path, cmd, tmpdir, warn):
+    """
+    Runs ``cmd`` (no shell needed) from within ``path``, with ``TMPDIR=tmpdir``.
+    Returns its stdout; unless ``warn``, a nonzero exit fails the test.
+    """
+    proc = subprocess.Popen(
+        shlex.split(cmd),
+        cwd=path,
+        env=dict(os.environ, TMPDIR=str(tmpdir)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    out, err = proc.communicate()
+    if proc.returncode and not warn:
+        pytest.fail("{!r} exited {}:\n{}{}".format(cmd, proc.returncode, out, err))
+    return out
+
+
+def _pytest_in_process(path, args, tmpdir):
+    """
+    ``pytest args`` from within ``path``, but in this interpreter, which has
+    magicinvoke & co imported already. Returns what the run printed; a failing
+    run fails the test.
+    """
+    out = six.StringIO()
+    old_cwd, old_stdout = os.getcwd(), sys.stdout
+    # Stand-ins for TMPDIR=: cachepath reads its location once, at import.
+    old_tempdir, old_location = tempfile.tempdir, cachepath.location
+    os.chdir(path)
+    sys.stdout = out
+    tempfile.tempdir = cachepath.location = str(tmpdir)
+    try:
+        exit_code = pytest.main(args)
+    finally:
+        os.chdir(old_cwd)
+        sys.stdout = old_stdout
+        tempfile.tempdir, cachepath.location = old_tempdir, old_location
+        # Don't leave the example's tasks/tests modules lying around for others.
+        for name, module in list(sys.modules.items()):
+            if module and (getattr(module, "__file__", "") or "").startswith(path + os.sep):
+                del sys.modules[name]
+    if exit_code:
+        pytest.fail("pytest {} exited {}:\n{}".format(" ".join(args), exit_code, out.getvalue()))
+    # Every output the run flagged should have its sidecar in this row's own .minv.
+    sidecars = [flags_path for (location, _), flags_path in FileFlagChecker._flags_paths.items()
+                if location == str(tmpdir)]
+    assert sidecars, "no sidecars were written under {}".format(tmpdir)
+    for flags_path in sidecars:
+        assert str(flags_path.parent) == str(tmpdir.join(".minv")) and flags_path.exists()
+    return out.getvalue()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _ctx_pformats(base_ctx):
+    # Was checked by every test_full_integration row, but the ctx never differed.
+    assert base_ctx.pformat()
+
+
+# Rows run on a copy of their example inside their own tmpdir (which is also
+# their cache root), so no two rows, nor two collections of one row, share files.
 @pytest.mark.parametrize(
     "folder, cmd, expected_output, py2_only",
     [
@@ -286,7 +411,7 @@ class test_nice_errors_for_skippables():
         ),
         (
             "data-pipeline",
-            "pytest --capture=no -k test_this",
+            "pytest --capture=no -k test_this tests.py",
             "We're good!",
             False,
         ),
@@ -295,16 +420,18 @@ class test_nice_errors_for_skippables():
     ],
 )
 def test_full_integration(folder, cmd, expected_output, py2_only, tmpdir):
-    # --durations=10, you will see each one gets run twice, maybe fix?
-    ctx = Context()
-    assert ctx.pformat()
-    with ctx.cd("sites/magic_docs/examples/{}".format(folder)):
-        result = ctx.run(
-            "TMPDIR={} {}".format(tmpdir, cmd), hide=True, warn=py2_only
-        ).stdout
-        try:
-            assert expected_output in result
-        except:
-            if py2_only and six.PY2:
-                pytest.xfail("We knew that.")
-            raise
+    example = os.path.normpath(_EXAMPLE_DIR.format(folder))
+    if not os.path.isdir(example):
+        pytest.skip("example {!r} isn't in this checkout".format(folder))
+    path = str(tmpdir.join(folder))
+    shutil.copytree(example, path, ignore=shutil.ignore_patterns("__pycache__", "*.pyc"))
+    if cmd.startswith("pytest "):
+        result = _pytest_in_process(path, cmd.split()[1:], tmpdir)
+    else:
+        result = _run_in(path, cmd, tmpdir, warn=py2_only)
+    try:
+        assert expected_output in result
+    except:
+        if py2_only and six.PY2:
+            pytest.xfail("We knew that.")
+        raise